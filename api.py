@@ -19,11 +19,10 @@ from battery_monitor import BatteryMonitor
 from external_rtc import ExternalRTC
 from util import Util
 
-# noinspection PyBroadException
 try:
 	from typing import Optional, List, Any, Generator, Callable, Dict, Iterable
 	from abc import abstractmethod, ABC
-except:
+except ImportError:
 	# noinspection PyUnusedLocal
 	def abstractmethod(*args, **kwargs):
 		"""
@@ -5,16 +5,16 @@ Abstraction of various I2C battery "fuel gauges."
 import board
 import digitalio
 import supervisor
+import time
 from adafruit_lc709203f import LC709203F, LC709203F_CMD_APA
 from adafruit_max1704x import MAX17048
 from busio import I2C
 
 from util import I2CDeviceAutoSelector
 
-# noinspection PyBroadException
 try:
 	from abc import abstractmethod, ABC
-except:
+except ImportError:
 	class ABC:
 		"""
 		Placeholder for CircuitPython
@@ -42,6 +42,9 @@ class BatteryMonitor(ABC):
 	This is an abstract class. Get instances using get_instance().
 	"""
 
+	# charge changes over minutes, so a reading this recent is reused instead of querying the hardware again
+	MAX_READING_AGE = 10
+
 	def __init__(self, i2c: I2C):
 		"""
 		Use get_instance() instead of this constructor to automatically construct a battery monitor of the correct
@@ -51,6 +54,7 @@ class BatteryMonitor(ABC):
 		"""
 
 		self.last_percent = None
+		self.last_read = None
 		self.i2c = i2c
 		self.device = None
 
@@ -118,12 +122,18 @@ class BatteryMonitor(ABC):
 		"""
 		Initializes the battery monitor hardware if necessary, gets the current charge percent, and normalizes the
 		response to be from 0% to 100%. Returns charge percent or None if it isn't known yet; for example, the hardware
-		hasn't finished initializing yet.
+		hasn't finished initializing yet. A known percent read within the last MAX_READING_AGE seconds is returned
+		as is without querying the hardware.
 
 		:return: Battery charge percent (0...100) or None if unknown or the charge is 0% and therefore implausible
 		"""
 
+		now = time.monotonic()
+		if self.last_percent is not None and now - self.last_read < BatteryMonitor.MAX_READING_AGE:
+			return self.last_percent
+
 		self.init_device()
+		self.last_read = now
 
 		self.last_percent = self.get_current_percent()
 
@@ -32,10 +32,12 @@ try:
 		from alarm.time import TimeAlarm
 		just_refresh_shutdown_screen = use_soft_power_control and isinstance(alarm.wake_alarm, TimeAlarm)
 
-	# init I2C and at a higher frequency than default
+	# init I2C; 100 kHz is the conservative default, but I2C_FREQUENCY can raise it (like to 400 kHz) for faster LCD and
+	# rotary encoder transfers
 	from busio import I2C
 	import board
-	i2c = I2C(sda = board.SDA, scl = board.SCL, frequency = 100000)
+	import os
+	i2c = I2C(sda = board.SDA, scl = board.SCL, frequency = os.getenv("I2C_FREQUENCY") or 100000)
 
 	# set up piezo, but only play the sound if this is a normal startup
 	piezo = None
@@ -10,10 +10,9 @@ from power_control import PowerControl
 from sdcard import SDCard
 from user_input import RotaryEncoder
 
-# noinspection PyBroadException
 try:
 	from typing import Optional, Dict, Callable, Any, List
-except:
+except ImportError:
 	pass
 	# ignore, just for IDE's sake, not supported on board
 
@@ -13,10 +13,9 @@ from busio import I2C
 
 from util import Util, I2CDeviceAutoSelector
 
-# noinspection PyBroadException
 try:
     from typing import Optional
-except:
+except ImportError:
     pass
 
 class ExternalRTC:
@@ -23,10 +23,9 @@ from ui_components import NumericSelector, VerticalMenu, VerticalCheckboxes, Act
 from user_input import WaitTickListener
 from util import Util
 
-# noinspection PyBroadException
 try:
 	from typing import Optional, cast, Dict, Callable, Final
-except:
+except ImportError:
 	pass
 	# ignore, just for IDE's sake, not supported on board
 
@@ -9,11 +9,10 @@ from util import I2CDeviceAutoSelector
 from nvram import NVRAMValues
 from sparkfun_serlcd import Sparkfun_SerLCD, Sparkfun_SerLCD_I2C
 
-# noinspection PyBroadException
 try:
 	from typing import List
 	from abc import abstractmethod, ABC
-except:
+except ImportError:
 	class ABC:
 		"""
 		Placeholder for CircuitPython.
@@ -31,10 +30,9 @@ except:
 
 from busio import I2C
 
-# noinspection PyBroadException
 try:
 	from typing import Optional
-except:
+except ImportError:
 	# don't care
 	pass
 
@@ -226,26 +224,117 @@ class LCD:
 	COLUMNS = 20
 	LINES = 4
 
+	# slice this for runs of spaces instead of building a new string each time
+	SPACES = " " * COLUMNS
+
 	def __init__(self, backlight: Backlight):
 		"""
 		:param backlight: Backlight instance to control this LCD's backlight color
 		"""
 		self.backlight = backlight
+
+		# what's believed to be on the screen, one list of characters per line; None where it isn't known
+		self.shadow: List[List[Optional[str]]] = []
+		self.forget_shadow()
+
 		for key, value in LCD.CHARS.items():
 			self.create_special_char(key, value)
 
+	def forget_shadow(self) -> None:
+		"""
+		Marks the entire screen's contents as unknown so the next writes anywhere go to the hardware in full.
+		"""
+		self.shadow = [[None] * LCD.COLUMNS for _ in range(LCD.LINES)]
+
+	def get_changed_span(self, message: str, coords: tuple[int, int]) -> Optional[tuple[str, tuple[int, int]]]:
+		"""
+		Compares a message against what's already on the screen at the given coordinates and records it as shown.
+		Only the span from the first to the last character that differs actually needs to be written; one contiguous
+		span is used instead of each changed run because every cursor move costs its own command. If writing the span
+		then fails, call forget_shadow() because the shadow would otherwise claim text that never made it to the screen.
+
+		:param message: Text that's about to be written
+		:param coords: Coordinates (x, y) it's about to be written at
+		:return: (message, coords) of the span that needs writing or None if the screen already shows the message
+		"""
+
+		x, y = coords
+		end = x + len(message)
+		if end > LCD.COLUMNS:
+			# overflowing text wraps differently on different LCDs, so stop trusting the shadow
+			self.forget_shadow()
+			return message, coords
+
+		row = self.shadow[y]
+		first = None
+		last = None
+		i = 0
+		for char in message:
+			if row[x + i] != char:
+				if first is None:
+					first = i
+				last = i
+				row[x + i] = char
+			i += 1
+
+		if first is None:
+			return None
+
+		return message[first:last + 1], (x + first, y)
+
 	def write(self, message: str, coords: tuple[int, int] = (0, 0)) -> None:
 		"""
 		Writes a message to the LCD at the given coordinates. The actual writing is delegated to write_impl() in
-		subclasses. Text that exceeds the width of the display minus the starting X coordinate might wrap on some LCDs
-		or be truncated on others, but generally the behavior is undefined and you should avoid writing long strings
-		this way. Same deal with newline characters and especially characters outside the lower ASCII character set.
+		subclasses, and only the part of the message that differs from what's already on the screen gets written.
+		Text that exceeds the width of the display minus the starting X coordinate might wrap on some LCDs or be
+		truncated on others, but generally the behavior is undefined and you should avoid writing long strings this way.
+		Same deal with newline characters and especially characters outside the lower ASCII character set.
 
 		:param message: Text to write
 		:param coords: Coordinates (x, y) to write at. (0, 0) is top-left.
 		"""
 		LCD.validate_coords(coords)
-		self.write_impl(message, coords)
+		span = self.get_changed_span(message, coords)
+		if span is not None:
+			try:
+				self.write_impl(*span)
+			except Exception:
+				# the shadow already claims this span, so after a failed write nothing on the screen can be trusted
+				self.forget_shadow()
+				raise
+
+	def write_batch(self, writes: List[tuple[str, tuple[int, int]]]) -> None:
+		"""
+		Writes several messages, each at its own coordinates, like calling write() for each one. Subclasses may
+		override write_batch_impl() to send them to the hardware in fewer transactions.
+
+		:param writes: List of (message, (x, y)) to write in order
+		"""
+		for _, coords in writes:
+			LCD.validate_coords(coords)
+
+		changed_writes = []
+		for message, coords in writes:
+			span = self.get_changed_span(message, coords)
+			if span is not None:
+				changed_writes.append(span)
+
+		if changed_writes:
+			try:
+				self.write_batch_impl(changed_writes)
+			except Exception:
+				self.forget_shadow()
+				raise
+
+	def write_batch_impl(self, writes: List[tuple[str, tuple[int, int]]]) -> None:
+		"""
+		Writes several already validated messages to the LCD hardware. The base implementation just calls
+		write_impl() for each one.
+
+		:param writes: List of (message, (x, y)) to write in order
+		"""
+		for message, coords in writes:
+			self.write_impl(message, coords)
 
 	@abstractmethod
 	def write_impl(self, message: str, coords: tuple[int, int]) -> None:
@@ -267,7 +356,7 @@ class LCD:
 		:param y_delta: Adjust the y position by this amount, like 1 to move down by one line from centered
 		"""
 		if erase_if_shorter_than is not None and len(text) < erase_if_shorter_than:
-			self.write(" " * erase_if_shorter_than, LCD.get_centered_coords(erase_if_shorter_than))
+			self.write(LCD.SPACES[:erase_if_shorter_than], LCD.get_centered_coords(erase_if_shorter_than))
 
 		coords = self.get_centered_coords(len(text), y_delta)
 		self.write(text, coords)
@@ -283,8 +372,7 @@ class LCD:
 		:return: (x, y) on the screen where to render the string
 		"""
 
-		coords = (max(int(LCD.COLUMNS / 2 - char_count / 2), 0), max(int(LCD.LINES / 2) - 1 + y_delta, 0))
-		return coords
+		return max((LCD.COLUMNS - char_count) // 2, 0), max(LCD.LINES // 2 - 1 + y_delta, 0)
 
 	def write_right_aligned(self, text: str, y: int = 0) -> None:
 		"""
@@ -316,10 +404,17 @@ class LCD:
 		"""
 		self.write(text, (0, LCD.LINES - 1 - y_delta))
 
-	@abstractmethod
 	def clear(self) -> None:
 		"""
-		Clears the display. Abstract method and must be overridden by child classes.
+		Clears the display. The actual clearing is delegated to clear_impl() in subclasses.
+		"""
+		self.clear_impl()
+		self.shadow = [[" "] * LCD.COLUMNS for _ in range(LCD.LINES)]
+
+	@abstractmethod
+	def clear_impl(self) -> None:
+		"""
+		Clears the display hardware. Abstract method and must be overridden by child classes.
 		"""
 		raise NotImplementedError()
 
@@ -329,7 +424,7 @@ class LCD:
 		:param special_char: LCD special character, like LCD.RIGHT.
 		:return: A character instance that can be concatenated to or embedded in a string
 		"""
-		return chr(special_char)
+		return LCD.SPECIAL_CHAR_STRS[special_char]
 
 	@abstractmethod
 	def create_special_char(self, special_char: int, data: List[int]) -> None:
@@ -386,6 +481,9 @@ LCD.CHARS = {
 	LCD.BLOCK: [0x1f, 0x1f, 0x1f, 0x1f, 0x1f, 0x1f, 0x1f, 0x1f]
 }
 
+# special characters as strings, indexed by their code, so they don't get rebuilt every time they're rendered
+LCD.SPECIAL_CHAR_STRS = tuple(chr(special_char) for special_char in range(len(LCD.CHARS)))
+
 class SparkfunSerLCD(LCD):
 	"""
 	An implementation of LCD for a Sparkfun SerLCD (https://www.sparkfun.com/products/16398).
@@ -397,6 +495,9 @@ class SparkfunSerLCD(LCD):
 		"""
 
 		self.device = lcd
+		# packing skips the delay the library leaves after each cursor command, so it's opt-in until it's known to be
+		# safe on the display's firmware
+		self.pack_writes = bool(os.getenv("SERLCD_PACK_WRITES"))
 		super().__init__(SparkfunSerLCDBacklight(lcd))
 		if not NVRAMValues.HAS_CONFIGURED_SPARKFUN_LCD:
 			self.device.command(0x2F) # turn off command messages
@@ -408,7 +509,14 @@ class SparkfunSerLCD(LCD):
 		self.device.set_cursor(x, y)
 		self.device.write(message)
 
-	def clear(self) -> None:
+	def write_batch_impl(self, writes: List[tuple[str, tuple[int, int]]]) -> None:
+		if self.pack_writes:
+			# cursor moves and text go out together instead of a separate (and slow) cursor command for each write
+			self.device.write_at((x, y, message) for message, (x, y) in writes)
+		else:
+			super().write_batch_impl(writes)
+
+	def clear_impl(self) -> None:
 		self.device.clear()
 
 	def create_special_char(self, special_char: int, data: List[int]) -> None:
@@ -435,5 +543,5 @@ class AdafruitCharacterLCDBackpack(LCD):
 		self.device.cursor_position(x, y)
 		self.device.message = message
 
-	def clear(self) -> None:
+	def clear_impl(self) -> None:
 		self.device.clear()
\ No newline at end of file
@@ -2,10 +2,9 @@
 Values persisted in non-volatile RAM (NVRAM) that persist across reboots and power cycles.
 """
 
-# noinspection PyBroadException
 try:
     from abc import abstractmethod, ABC
-except:
+except ImportError:
     class ABC:
         """
 		Placeholder for CircuitPython.
@@ -8,10 +8,9 @@ import traceback
 
 from external_rtc import ExternalRTC
 
-# noinspection PyBroadException
 try:
 	from typing import List, Callable, Optional
-except:
+except ImportError:
 	pass
 
 from api import APIRequest, GetAllTimersAPIRequest
@@ -10,10 +10,9 @@ from adafruit_datetime import datetime
 from api import Timer
 from sdcard import SDCard
 
-# noinspection PyBroadException
 try:
     from typing import Optional
-except:
+except ImportError:
     pass
 
 class OfflineState:
@@ -6,10 +6,10 @@ import time
 
 from devices import Devices
 
-# noinspection PyBroadException
 try:
+	from typing import Optional
 	from abc import abstractmethod
-except:
+except ImportError:
 	# noinspection PyUnusedLocal
 	def abstractmethod(*args, **kwargs):
 		"""
@@ -38,21 +38,25 @@ class PeriodicChime:
 		Start counting from now.
 		"""
 
-		self.last_chime = time.monotonic()
+		now = time.monotonic()
+		self.last_chime = now
 		self.total_elapsed = 0
-		self.started_at = time.monotonic()
+		self.started_at = now
 
-	def chime_if_needed(self) -> None:
+	def chime_if_needed(self, now: Optional[float] = None) -> None:
 		"""
 		Checks how much time has elapsed and, if a chime is due, play it.
+
+		:param now: Current monotonic time if the caller already has it, or None to read it
 		"""
 
-		now = time.monotonic()
+		if now is None:
+			now = time.monotonic()
 		self.total_elapsed = now - self.started_at
 
 		elapsed = now - self.last_chime
 		if self.is_chime_time(elapsed):
-			self.last_chime = time.monotonic()
+			self.last_chime = now
 			self.devices.piezo.tone("chime")
 
 	@abstractmethod
@@ -16,10 +16,9 @@ from nvram import NVRAMValues
 from piezo import Piezo
 from user_input import RotaryEncoder
 
-# noinspection PyBroadException
 try:
 	from typing import Optional
-except:
+except ImportError:
 	pass
 
 class PowerControl:
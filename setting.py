@@ -4,10 +4,9 @@ User-controllable settings that are exposed in the UI.
 
 from nvram import NVRAMBooleanValue
 
-# noinspection PyBroadException
 try:
 	from typing import Callable, Optional
-except:
+except ImportError:
 	pass
 
 class Setting:
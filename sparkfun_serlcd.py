@@ -76,6 +76,8 @@ DEFAULT_I2C_ADDR = const(0x72)
 # private constants
 _MAX_ROWS = const(4)
 _MAX_COLS = const(20)
+_ROW_OFFSETS = (0x00, 0x40, 0x14, 0x54)
+_MAX_TRANSFER = const(32)
 
 # Character to reset display Splash Screen to default
 _DEFAULT_SPLASH_SCREEN = const(0xFF)
@@ -240,6 +242,30 @@ class Sparkfun_SerLCD:
         # send the command
         self._special_command(_LCD_SETDDRAMADDR | (col + row_offsets[row]))
 
+    def write_at(self, writes):
+        """Write several strings, each at its own cursor position, packing the
+        cursor commands and text into as few transfers as possible. Unlike
+        set_cursor(), this doesn't wait after each cursor command, which the
+        display's firmware isn't documented to tolerate; only use it if the
+        display has been checked to show packed writes correctly.
+        writes - iterable of (col, row, message)"""
+        data = bytearray()
+        for col, row, message in writes:
+            row = min(max(0, row), _MAX_ROWS - 1)
+            text = str(message).encode()
+
+            # the display's receive buffer is only 32 bytes, so flush before overflowing it
+            if len(data) + 2 + len(text) > _MAX_TRANSFER:
+                self._write_bytes(data)
+                data = bytearray()
+
+            data.append(_SPECIAL_COMMAND)
+            data.append(_LCD_SETDDRAMADDR | (col + _ROW_OFFSETS[row]))
+            data.extend(text)
+
+        if data:
+            self._write_bytes(data)
+
     def create_character(self, location, charmap):
         """Create a customer character
         location - character number 0 to 7
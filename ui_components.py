@@ -2,8 +2,6 @@
 Components used to render the UI.
 """
 
-import math
-
 from devices import Devices
 from lcd import LCD, BacklightColors, BacklightColor
 from nvram import NVRAMValues
@@ -13,11 +11,10 @@ import time
 
 from util import Util
 
-# noinspection PyBroadException
 try:
 	from typing import Optional, Callable
 	from abc import ABC, abstractmethod
-except:
+except ImportError:
 	class ABC:
 		"""
 		Placeholder for CircuitPython.
@@ -41,6 +38,13 @@ class UIComponent(ABC):
 	RIGHT = 0
 	LEFT = 1
 
+	# widget strings shared by every component, built the first time they're needed
+	default_cancel_text: Optional[str] = None
+	save_messages = {}
+
+	# battery percentage currently shown at the top-right, so a refresh knows how much of it to overwrite
+	battery_message: Optional[str] = None
+
 	def __init__(self,
 		devices: Devices,
 		allow_cancel: bool = True,
@@ -64,11 +68,45 @@ class UIComponent(ABC):
 		self.devices = devices
 		self.allow_cancel = allow_cancel
 		self.cancel_align = cancel_align
-		self.cancel_text = self.devices.lcd[LCD.LEFT] + ("Cancel" if cancel_text is None else cancel_text)
+		if cancel_text is None:
+			if UIComponent.default_cancel_text is None:
+				UIComponent.default_cancel_text = self.devices.lcd[LCD.LEFT] + "Cancel"
+			self.cancel_text = UIComponent.default_cancel_text
+		else:
+			self.cancel_text = self.devices.lcd[LCD.LEFT] + cancel_text
 		self.header = header
 		self.save_text = save_text
 		self.save_text_y_delta = save_text_y_delta
 
+		# where the Cancel and Save widgets go doesn't change between renders, so work it out once
+		self.cancel_coords = None
+		if self.allow_cancel:
+			if self.cancel_align == UIComponent.RIGHT:
+				y_delta = 0 if self.save_text is None else 1
+				self.cancel_coords = (LCD.COLUMNS - len(self.cancel_text), LCD.LINES - 1 - y_delta)
+			elif self.cancel_align == UIComponent.LEFT or self.cancel_align is None:
+				self.cancel_coords = (0, LCD.LINES - 1)
+			else:
+				raise ValueError(f"Unknown alignment {self.cancel_align}")
+
+		self.save_message = None
+		self.save_coords = None
+		if self.save_text is not None:
+			self.save_message = UIComponent.save_messages.get(self.save_text)
+			if self.save_message is None:
+				self.save_message = self.save_text + self.devices.lcd[LCD.RIGHT]
+				UIComponent.save_messages[self.save_text] = self.save_message
+			self.save_coords = (LCD.COLUMNS - len(self.save_message), LCD.LINES - 1 - self.save_text_y_delta)
+
+		# the header and widgets that apply to this component, sent together in one batch on each render
+		self.widget_writes = []
+		if self.header is not None:
+			self.widget_writes.append((self.header, (0, 0)))
+		if self.cancel_coords is not None:
+			self.widget_writes.append((self.cancel_text, self.cancel_coords))
+		if self.save_message is not None:
+			self.widget_writes.append((self.save_message, self.save_coords))
+
 	def render(self):
 		"""
 		Renders the UI. Child classes will greatly extend this method but should always call the base method.
@@ -83,24 +121,18 @@ class UIComponent(ABC):
 		"""
 		self.devices.lcd.clear()
 
-		if self.header is not None:
-			self.devices.lcd.write(self.header)
+		writes = self.widget_writes
 
 		battery_percent = self.devices.battery_monitor.get_percent() if self.devices.battery_monitor else None
-		if battery_percent is not None:
-			self.devices.lcd.write_right_aligned(Util.format_battery_percent(battery_percent))
-
-		if self.allow_cancel:
-			if self.cancel_align == UIComponent.RIGHT:
-				self.devices.lcd.write_bottom_right_aligned(self.cancel_text, 0 if self.save_text is None else 1)
-			elif self.cancel_align == UIComponent.LEFT or self.cancel_align is None:
-				self.devices.lcd.write_bottom_left_aligned(self.cancel_text)
-			else:
-				raise ValueError(f"Unknown alignment {self.cancel_align}")
+		if battery_percent is None:
+			UIComponent.battery_message = None
+		else:
+			message = Util.format_battery_percent(battery_percent)
+			UIComponent.battery_message = message
+			writes = writes + [(message, (LCD.COLUMNS - len(message), 0))]
 
-		if self.save_text is not None:
-			save_message = self.save_text + self.devices.lcd[LCD.RIGHT]
-			self.devices.lcd.write_bottom_right_aligned(save_message, self.save_text_y_delta)
+		if writes:
+			self.devices.lcd.write_batch(writes)
 
 		return self
 
@@ -140,18 +172,15 @@ class UIComponent(ABC):
 		if last_percent is None and percent is None:
 			return
 
-		message = Util.format_battery_percent(percent)
-
 		if not only_if_changed or last_percent != percent:
-			if last_percent is not None and percent < last_percent:
-				current_len = len(message)
-				last_len = len(Util.format_battery_percent(last_percent))
-				char_count_difference = last_len - current_len
+			message = Util.format_battery_percent(percent)
+			last_message = UIComponent.battery_message
+			UIComponent.battery_message = message
 
-				if char_count_difference > 0:
-					devices.lcd.write(" " * char_count_difference, (LCD.COLUMNS - last_len, 0))
+			# blank out whatever's left of a longer previous value in the same write
+			if last_message is not None and len(last_message) > len(message):
+				message = LCD.SPACES[:len(last_message) - len(message)] + message
 
-			message = Util.format_battery_percent(percent)
 			devices.lcd.write(message, (LCD.COLUMNS - len(message), 0))
 
 class StatusMessage(UIComponent):
@@ -173,6 +202,34 @@ class StatusMessage(UIComponent):
 		self.devices.lcd.write_centered(self.message)
 		return self
 
+class ModalDialogExpiredException(Exception):
+	"""
+	Raised when a modal dialog times out. This gets caught internally by Modal so you should never see it.
+	"""
+
+	pass
+
+class AutoDismissWaitTickListener(WaitTickListener):
+	"""
+	Raises a ModalDialogExpiredException after a specified timeout.
+	"""
+
+	def __init__(self, auto_dismiss_after_seconds: int):
+		"""
+		:param auto_dismiss_after_seconds: Raise an exception after this many seconds have elapsed
+		"""
+
+		super().__init__(auto_dismiss_after_seconds, self.dismiss_dialog)
+
+	def dismiss_dialog(self, _: float) -> None:
+		"""
+		Raises a ModalDialogExpiredException.
+
+		:param _: Ignored
+		"""
+
+		raise ModalDialogExpiredException()
+
 class Modal(UIComponent):
 	"""
 	A simple text dialog that must be dismissed by the user with no other actions or automatically closes after a
@@ -216,47 +273,19 @@ class Modal(UIComponent):
 		:return: True if the user explicitly dismissed this modal using input or False if it just timed out instead
 		"""
 
-		class ModalDialogExpiredException(Exception):
-			"""
-			Raised when a modal dialog times out. This gets caught internally so you should never see it.
-			"""
-
-			pass
-
-		class AutoDismissWaitTickListener(WaitTickListener):
-			"""
-			Raises an exception after a specified timeout.
-			"""
-
-			def __init__(self, auto_dismiss_after_seconds: int):
-				"""
-				:param auto_dismiss_after_seconds: Raise an exception after this many seconds have elapsed
-				"""
-
-				super().__init__(auto_dismiss_after_seconds, self.dismiss_dialog)
-
-			def dismiss_dialog(self, _: float) -> None:
-				"""
-				Raises a ModalDialogExpiredException.
-
-				:param _: Ignored
-				:return:
-				"""
-
-				raise ModalDialogExpiredException()
-
 		extra_wait_tick_listeners = [] if self.auto_dismiss_after_seconds <= 0 else [AutoDismissWaitTickListener(self.auto_dismiss_after_seconds)]
+		rotary_encoder = self.devices.rotary_encoder
 
 		while True:
 			try:
-				button = self.devices.rotary_encoder.wait(
+				button = rotary_encoder.wait(
 					listen_for_rotation = False,
 					extra_wait_tick_listeners = extra_wait_tick_listeners
 				)
 			except ModalDialogExpiredException:
 				return False
 
-			if self.save_text is not None and (button == RotaryEncoder.SELECT or button == RotaryEncoder.RIGHT):
+			if self.save_text is not None and button in RotaryEncoder.ACCEPT_INPUTS:
 				return True
 
 class NoisyBrightModal(Modal):
@@ -385,10 +414,17 @@ class ProgressBar(UIComponent):
 		)
 
 		self.count = count
+		self.count_str = str(count)
+		self.total_str = "/" + self.count_str
+		self.total_coords = (LCD.COLUMNS - len(self.total_str), 2)
 		self.index = 0
-		self.last_block_count = -1
-		self.max_block_count = LCD.COLUMNS - len(str(self.count)) * 2 - 1
+		self.last_block_count = 0
+		self.index_x = LCD.COLUMNS - len(self.count_str) * 2 - 1
+		self.max_block_count = self.index_x
+		# a full bar; any number of blocks is a slice of it
+		self.blocks = self.devices.lcd[LCD.BLOCK] * self.max_block_count
 		self.message = message
+		self.message_coords = LCD.get_centered_coords(len(message))
 
 	def set_index(self, index: int = 0) -> None:
 		"""
@@ -403,29 +439,48 @@ class ProgressBar(UIComponent):
 		if index >= self.count:
 			raise ValueError(f"Index must be < {self.count}, not {index}")
 
+		if index == self.index:
+			return # already showing this index
+
 		self.index = index
 
 		self.render_progress()
 
-	def render_progress(self) -> None:
+	def get_block_count(self) -> int:
 		"""
-		Updates the progress shown. As a consumer of this component, you probably want to use set_index(); this just
-		redraws the relevant parts of the screen based on the component's current data.
+		Gets how many blocks of the bar the current index fills.
+
+		:return: Integer ceiling of the fraction of max_block_count that's done
 		"""
 
-		self.devices.lcd.write(
-			message = str(self.index + 1),
-			coords = (LCD.COLUMNS - len(str(self.count)) * 2 - 1, 2)
-		)
+		return ((self.index + 1) * self.max_block_count + self.count - 1) // self.count
 
-		block_count = math.ceil(((self.index + 1) / self.count) * self.max_block_count) + 1
+	def render_progress(self) -> None:
+		"""
+		Updates the progress shown since the last render() or update. As a consumer of this component, you probably
+		want to use set_index(); this just redraws the relevant parts of the screen based on the component's current
+		data.
+		"""
+
+		lcd = self.devices.lcd
+		last_block_count = self.last_block_count
+		index_str = str(self.index + 1)
+		block_count = self.get_block_count()
 
-		if self.last_block_count == -1:
-			self.devices.lcd.write(self.devices.lcd[LCD.BLOCK] * block_count, (0, 2))
+		if block_count > last_block_count:
+			extra_blocks = self.blocks[:block_count - last_block_count]
+			if block_count == self.index_x:
+				# the new blocks run right up to the index, so write both at once
+				lcd.write(extra_blocks + index_str, (last_block_count, 2))
+			else:
+				lcd.write_batch([
+					(index_str, (self.index_x, 2)),
+					(extra_blocks, (last_block_count, 2))
+				])
 			self.last_block_count = block_count
-		elif block_count != self.last_block_count:
-			extra_blocks = block_count - self.last_block_count
-			self.devices.lcd.write(self.devices.lcd[LCD.BLOCK] * extra_blocks, (self.last_block_count - 1, 2))
+		else:
+			# no new blocks to draw
+			lcd.write(message = index_str, coords = (self.index_x, 2))
 
 	def render(self) -> UIComponent:
 		"""
@@ -435,12 +490,64 @@ class ProgressBar(UIComponent):
 
 		super().render()
 
-		self.devices.lcd.write_centered(self.message)
-		self.devices.lcd.write_right_aligned("/" + str(self.count), 2)
-		self.render_progress()
+		# the screen was just cleared, so draw the whole bar so far along with everything else
+		block_count = self.get_block_count()
+		self.devices.lcd.write_batch([
+			(self.message, self.message_coords),
+			(self.total_str, self.total_coords),
+			(self.blocks[:block_count], (0, 2)),
+			(str(self.index + 1), (self.index_x, 2))
+		])
+		self.last_block_count = block_count
 
 		return self
 
+class ActiveTimerWaitTickListener(WaitTickListener):
+	"""
+	A listener that updates the time shown by an ActiveTimer as it increments.
+	"""
+
+	NANOSECONDS_PER_SECOND = 1000000000
+
+	def __init__(self,
+				 devices: Devices,
+				 start_ns: int,
+				 periodic_chime: Optional[PeriodicChime]
+	):
+		"""
+		:param devices: Devices dependency injection
+		:param start_ns: Monotonic time in nanoseconds that the timer counts up from
+		:param periodic_chime: Periodic chiming logic or None for no chimes
+		"""
+
+		self.start_ns = start_ns
+		self.last_elapsed = None
+		self.devices = devices
+		self.periodic_chime = periodic_chime
+		super().__init__(seconds = 1, on_tick = self.render_elapsed_time, recurring = True)
+		self.render_elapsed_time(0)
+
+	def render_elapsed_time(self, _: float) -> None:
+		"""
+		Updates the elapsed time shown and chimes if needed, but only if the whole number of seconds elapsed has
+		changed since the last update.
+
+		:param _: Ignored
+		"""
+
+		# integer nanoseconds don't lose precision with uptime like monotonic()'s float does on CircuitPython
+		now_ns = time.monotonic_ns()
+		elapsed = (now_ns - self.start_ns) // ActiveTimerWaitTickListener.NANOSECONDS_PER_SECOND
+		if elapsed == self.last_elapsed:
+			return # chime intervals are whole seconds too, so there's nothing to do until the next second
+
+		# the formatted time never gets shorter as it counts up, so there's nothing left over to erase
+		self.devices.lcd.write_centered(Util.format_elapsed_time(elapsed))
+		self.last_elapsed = elapsed
+
+		if self.periodic_chime is not None:
+			self.periodic_chime.chime_if_needed(now_ns / ActiveTimerWaitTickListener.NANOSECONDS_PER_SECOND)
+
 class ActiveTimer(UIComponent):
 	"""
 	Shows a timer that counts up. This UI can't be wait()ed.
@@ -477,7 +584,7 @@ class ActiveTimer(UIComponent):
 			header = header,
 			save_text = save_text
 		)
-		self.start = None
+		self.start_ns = None
 		self.periodic_chime = periodic_chime
 		self.start_at = start_at
 		self.save_text = save_text
@@ -502,53 +609,13 @@ class ActiveTimer(UIComponent):
 		:return: True if the user inputted "Save" or "None" if it was canceled.
 		"""
 
-		self.start = time.monotonic()
+		self.start_ns = time.monotonic_ns()
 		if self.periodic_chime is not None:
 			self.periodic_chime.start()
 
-		class ActiveTimerWaitTickListener(WaitTickListener):
-			"""
-			A listener that updates the time as it increments.
-			"""
-			def __init__(self,
-						 devices: Devices,
-						 start: float,
-						 periodic_chime: Optional[PeriodicChime]
-			):
-				"""
-				:param devices: Devices dependency injection
-				:param start: Start at this many seconds
-				:param periodic_chime: Periodic chiming logic or None for no chimes
-				"""
-
-				self.start = start
-				self.last_message = None
-				self.devices = devices
-				self.periodic_chime = periodic_chime
-				super().__init__(seconds = 1, on_tick = self.render_elapsed_time, recurring = True)
-				self.render_elapsed_time(start)
-
-			def render_elapsed_time(self, _: float) -> None:
-				"""
-				Updates the elapsed time shown.
-
-				:param _: Ignored
-				"""
-
-				elapsed = time.monotonic() - self.start
-				message = Util.format_elapsed_time(elapsed)
-				self.devices.lcd.write_centered(
-					text = message,
-					erase_if_shorter_than = None if self.last_message is None else len(self.last_message)
-				)
-				self.last_message = message
-
-				if self.periodic_chime is not None:
-					self.periodic_chime.chime_if_needed()
-
 		listeners = [ActiveTimerWaitTickListener(
 			devices = self.devices,
-			start = self.start - self.start_at,
+			start_ns = self.start_ns - int(self.start_at * ActiveTimerWaitTickListener.NANOSECONDS_PER_SECOND),
 			periodic_chime = self.periodic_chime
 		)]
 
@@ -561,14 +628,15 @@ class ActiveTimer(UIComponent):
 					name = "Soft shutdown idle timeout"
 				))
 
+		rotary_encoder = self.devices.rotary_encoder
 		while True:
-			button = self.devices.rotary_encoder.wait(
+			button = rotary_encoder.wait(
 				listen_for_rotation = False,
 				extra_wait_tick_listeners = listeners
 			)
 			if button == RotaryEncoder.LEFT and self.allow_cancel:
 				return None
-			elif button == RotaryEncoder.SELECT or button == RotaryEncoder.RIGHT:
+			elif button in RotaryEncoder.ACCEPT_INPUTS:
 				return True
 
 class NumericSelector(UIComponent):
@@ -630,10 +698,38 @@ class NumericSelector(UIComponent):
 			assert(value % step == 0)
 
 		self.range = (minimum, maximum)
+		# unbounded ends clamp against infinity so wait() doesn't need to check for None
+		self.clamp_range = (
+			float("-inf") if minimum is None else minimum,
+			float("inf") if maximum is None else maximum
+		)
 		self.step = step
 		self.selected_value = value
 		self.format_str = format_str
 		self.row = 1 if self.header else 0
+		self.up_down_char = self.devices.lcd[LCD.UP_DOWN]
+
+		# the two most recently formatted (value, string) pairs; turning back and forth revisits them often
+		self.formatted_values = [(None, None), (None, None)]
+		self.formatted_values_index = 0
+
+	def format_value(self, value: float) -> str:
+		"""
+		Formats a value with format_str, reusing the result if it's one of the last two values formatted.
+
+		:param value: Value to format
+		:return: Formatted value
+		"""
+
+		for formatted_value, formatted_str in self.formatted_values:
+			if formatted_str is not None and formatted_value == value:
+				return formatted_str
+
+		formatted_str = self.format_str % value
+		self.formatted_values[self.formatted_values_index] = (value, formatted_str)
+		self.formatted_values_index ^= 1
+
+		return formatted_str
 
 	def render(self) -> UIComponent:
 		"""
@@ -642,7 +738,7 @@ class NumericSelector(UIComponent):
 		"""
 
 		super().render()
-		self.devices.lcd.write(self.devices.lcd[LCD.UP_DOWN], (0, self.row))
+		self.devices.lcd.write(self.up_down_char, (0, self.row))
 
 		return self
 
@@ -654,43 +750,65 @@ class NumericSelector(UIComponent):
 		you should strictly check for "is None" for what this returns.
 		"""
 
+		# looked up once instead of on every input
+		lcd = self.devices.lcd
+		rotary_encoder = self.devices.rotary_encoder
+		row = self.row
+		step = self.step
+		minimum, maximum = self.clamp_range
+
 		last_value = None
+		last_str = ""
+		last_len = 0
 		while True:
-			if last_value != self.selected_value:
-				if last_value is not None:
-					selected_strlen = len(self.format_str % self.selected_value)
-					last_strlen = len(self.format_str % last_value)
-					value_strlen_difference = last_strlen - selected_strlen
-					if value_strlen_difference > 0:
-						self.devices.lcd.write(
-							message = " " * value_strlen_difference,
-							coords = (1 + last_strlen - value_strlen_difference, self.row))
-
-				self.devices.lcd.write(message = self.format_str % self.selected_value, coords = (1, self.row))
+			# only format when the value changed; no-op input like pressing up at the maximum doesn't
+			if self.selected_value != last_value:
+				value_str = self.format_value(self.selected_value)
+				value_len = len(value_str)
+
+				# pad with spaces to cover a longer previous value so it gets blanked in the same write
+				padded_str = value_str
+				if value_len < last_len:
+					padded_str += LCD.SPACES[:last_len - value_len]
+				padded_len = len(padded_str)
+
+				# only write the span between the common prefix and, if aligned, the common suffix
+				start = 0
+				max_len = min(padded_len, last_len)
+				while start < max_len and padded_str[start] == last_str[start]:
+					start += 1
+
+				end = padded_len
+				if padded_len == last_len:
+					while end > start and padded_str[end - 1] == last_str[end - 1]:
+						end -= 1
+
+				if start < end:
+					lcd.write(message = padded_str[start:end], coords = (1 + start, row))
 
 				last_value = self.selected_value
+				last_str = value_str
+				last_len = value_len
 
-			button = self.devices.rotary_encoder.wait()
+			button = rotary_encoder.wait()
 			if button == RotaryEncoder.LEFT and self.allow_cancel:
 				return None
-			if button == RotaryEncoder.UP or button == RotaryEncoder.CLOCKWISE:
-				self.selected_value += self.step
-			elif button == RotaryEncoder.DOWN or button == RotaryEncoder.COUNTERCLOCKWISE:
-				self.selected_value -= self.step
-			elif button == RotaryEncoder.SELECT or button == RotaryEncoder.RIGHT:
+			# only the bound in the direction of travel can be crossed, and other input can't cross either
+			if button in RotaryEncoder.INCREMENT_INPUTS:
+				self.selected_value = min(self.selected_value + step, maximum)
+			elif button in RotaryEncoder.DECREMENT_INPUTS:
+				self.selected_value = max(self.selected_value - step, minimum)
+			elif button in RotaryEncoder.ACCEPT_INPUTS:
 				return self.selected_value
 
-			minimum, maximum = self.range
-			if minimum is not None and self.selected_value < minimum:
-				self.selected_value = minimum
-			elif maximum is not None and self.selected_value > maximum:
-				self.selected_value = maximum
-
 class VerticalMenu(UIComponent):
 	"""
 	Shows a list of menu items and allows the user to select one.
 	"""
 
+	# True if format_menu_item() only depends on the item itself so the formatted rows can be built once
+	STATIC_ROWS = True
+
 	def __init__(self,
 				 devices: Devices,
 				 options: list[str],
@@ -730,9 +848,33 @@ class VerticalMenu(UIComponent):
 		)
 
 		self.options = options
+		self.option_count = len(options)
 		self.selected_row_index = None
+		self.arrow_char = self.devices.lcd[LCD.RIGHT]
 		self.initial_selection = initial_selection
 
+		# menu items start on the line after the header, if there is one
+		first_row = 0 if self.header is None else 1
+		self.rows = tuple(range(first_row, first_row + self.option_count))
+
+		self.rendered_rows = None
+		if self.STATIC_ROWS:
+			self.rendered_rows = tuple(self.format_menu_item(i, value) for i, value in enumerate(options))
+
+		# button -> (move method, wrap); buttons wrap but rotation doesn't
+		self.move_dispatch = {
+			RotaryEncoder.UP: (self.move_selection_up, True),
+			RotaryEncoder.COUNTERCLOCKWISE: (self.move_selection_up, False),
+			RotaryEncoder.DOWN: (self.move_selection_down, True),
+			RotaryEncoder.CLOCKWISE: (self.move_selection_down, False)
+		}
+
+		# button -> handler that returns the menu's response or None to keep waiting
+		self.press_dispatch = {
+			RotaryEncoder.RIGHT: self.on_right_pressed,
+			RotaryEncoder.SELECT: self.on_select_pressed
+		}
+
 	def index_to_row(self, i: int) -> int:
 		"""
 		Maps a list index to its y coordinate.
@@ -741,11 +883,7 @@ class VerticalMenu(UIComponent):
 		:return: y coordinate
 		"""
 
-		row = i
-		if self.header is not None:
-			row += 1
-
-		return row
+		return self.rows[i]
 
 	def move_selection(self, button: int) -> bool:
 		"""
@@ -755,14 +893,12 @@ class VerticalMenu(UIComponent):
 		:return: True if the selection actually moved so it needs to be rendered or False if there was no effect
 		"""
 
-		if button == RotaryEncoder.UP or button == RotaryEncoder.COUNTERCLOCKWISE:
-			self.move_selection_up(wrap = button == RotaryEncoder.UP)
-			return True
-		elif button == RotaryEncoder.DOWN or button == RotaryEncoder.CLOCKWISE:
-			self.move_selection_down(wrap = button == RotaryEncoder.DOWN)
-			return True
+		entry = self.move_dispatch.get(button)
+		if entry is None:
+			return False
 
-		return False
+		move, wrap = entry
+		return move(wrap = wrap)
 
 	def on_select_pressed(self) -> int:
 		"""
@@ -793,6 +929,16 @@ class VerticalMenu(UIComponent):
 		"""
 		return name
 
+	def build_menu_items(self) -> tuple[str, ...]:
+		"""
+		Formats every menu item for rendering. Items that only depend on their own name are formatted once during
+		construction; child classes whose items change, like checkboxes, override this.
+
+		:return: Formatted menu items in the same order as the options
+		"""
+
+		return self.rendered_rows
+
 	def render(self) -> UIComponent:
 		"""
 		Draws the initial menu and sets the arrow to the initially selected item.
@@ -802,14 +948,21 @@ class VerticalMenu(UIComponent):
 
 		super().render()
 
+		selected_row_index = 0 if self.initial_selection is None else self.initial_selection
+
+		writes = []
 		i = 0
-		for value in self.options:
-			# skip first column; arrow goes there
-			item_str = self.format_menu_item(i, value)
-			self.devices.lcd.write(item_str, (1, self.index_to_row(i)))
+		for item_str in self.build_menu_items():
+			if i == selected_row_index:
+				# draw the arrow in the same write as the item instead of moving the cursor back for it after
+				writes.append((self.arrow_char + item_str, (0, self.rows[i])))
+			else:
+				# skip first column; arrow goes there
+				writes.append((item_str, (1, self.rows[i])))
 			i += 1
 
-		self.move_arrow(0 if self.initial_selection is None else self.initial_selection)
+		self.devices.lcd.write_batch(writes)
+		self.selected_row_index = selected_row_index
 
 		return self
 
@@ -820,51 +973,58 @@ class VerticalMenu(UIComponent):
 		:return: Index of the item selected or None if canceled
 		"""
 
+		rotary_encoder = self.devices.rotary_encoder
 		while True:
-			button = self.devices.rotary_encoder.wait()
-			if not self.move_selection(button):
-				if button == RotaryEncoder.LEFT and self.allow_cancel:
+			button = rotary_encoder.wait()
+			if self.move_selection(button):
+				continue
+
+			if button == RotaryEncoder.LEFT:
+				if self.allow_cancel:
 					return None
-				elif button == RotaryEncoder.RIGHT:
-					result = self.on_right_pressed()
-					if result is not None:
-						return result
-				elif button == RotaryEncoder.SELECT:
-					result = self.on_select_pressed()
-					if result is not None:
-						return result
+				continue
+
+			handler = self.press_dispatch.get(button)
+			if handler is not None:
+				result = handler()
+				if result is not None:
+					return result
 
-	def move_selection_up(self, wrap: bool = True) -> None:
+	def move_selection_up(self, wrap: bool = True) -> bool:
 		"""
 		Moves the selection arrow up a row, or if already at the top and wrap is True, to the last menu item.
 
 		:param wrap: True to wraparound the selection, False to not
+		:return: True if the selection moved, False if it was already at the top and wrap is False
 		"""
 
 		row_index = self.selected_row_index - 1
 		if row_index < 0:
 			if wrap:
-				row_index = len(self.options) - 1
+				row_index = self.option_count - 1
 			else:
-				return
+				return False
 
 		self.move_arrow(row_index)
+		return True
 
-	def move_selection_down(self, wrap: bool = True) -> None:
+	def move_selection_down(self, wrap: bool = True) -> bool:
 		"""
 		Moves the selection arrow down a row, or if already at the bottom and wrap is True, to the first menu item.
 
 		:param wrap: True to wraparound the selection, False to not
+		:return: True if the selection moved, False if it was already at the bottom and wrap is False
 		"""
 
 		row_index = self.selected_row_index + 1
-		if row_index >= len(self.options):
+		if row_index >= self.option_count:
 			if wrap:
 				row_index = 0
 			else:
-				return
+				return False
 
 		self.move_arrow(row_index)
+		return True
 
 	def move_arrow(self, row_index: int) -> None:
 		"""
@@ -873,10 +1033,17 @@ class VerticalMenu(UIComponent):
 		:param row_index: Menu item index
 		"""
 
-		self.devices.lcd.write(message = self.devices.lcd[LCD.RIGHT], coords = (0, self.index_to_row(row_index)))
+		if row_index == self.selected_row_index:
+			return # arrow is already there, like wrapping around a single item menu
 
-		if self.selected_row_index is not None and row_index != self.selected_row_index:
-			self.devices.lcd.write(message = " ", coords = (0, self.index_to_row(self.selected_row_index)))
+		if self.selected_row_index is None:
+			self.devices.lcd.write(message = self.arrow_char, coords = (0, self.rows[row_index]))
+		else:
+			# one batch so backends that support it send both in a single transaction
+			self.devices.lcd.write_batch([
+				(self.arrow_char, (0, self.rows[row_index])),
+				(" ", (0, self.rows[self.selected_row_index]))
+			])
 
 		self.selected_row_index = row_index
 
@@ -885,6 +1052,9 @@ class BooleanPrompt(VerticalMenu):
 	A VerticalMenu with only two options.
 	"""
 
+	# selected index -> response, in the same order as the options
+	RESPONSES = (True, False)
+
 	def __init__(self,
 		devices: Devices,
 		header: str,
@@ -916,13 +1086,15 @@ class BooleanPrompt(VerticalMenu):
 		"""
 
 		response = super().wait()
-		return response == 0
+		return False if response is None else BooleanPrompt.RESPONSES[response]
 
 class VerticalCheckboxes(VerticalMenu):
 	"""
 	Like VerticalMenu, but each item is a checkbox that can be toggled.
 	"""
 
+	STATIC_ROWS = False
+
 	def __init__(self,
 		devices: Devices,
 		options: list[str],
@@ -956,7 +1128,12 @@ class VerticalCheckboxes(VerticalMenu):
 
 		assert(len(options) == len(initial_states))
 
-		self.states = initial_states
+		# bit i is set if item i is checked
+		self.states = 0
+		for i, state in enumerate(initial_states):
+			if state:
+				self.states |= 1 << i
+		self.checkbox_chars = (self.devices.lcd[LCD.UNCHECKED], self.devices.lcd[LCD.CHECKED])
 
 	def get_checkbox_char(self, index: int) -> str:
 		"""
@@ -966,7 +1143,7 @@ class VerticalCheckboxes(VerticalMenu):
 		:return: Checkbox character based on the given item's state
 		"""
 
-		return self.devices.lcd[LCD.CHECKED] if self.states[index] else self.devices.lcd[LCD.UNCHECKED]
+		return self.checkbox_chars[(self.states >> index) & 1]
 
 	def toggle_item(self, index: int) -> None:
 		"""
@@ -975,8 +1152,8 @@ class VerticalCheckboxes(VerticalMenu):
 		:param index: Item index
 		"""
 
-		self.states[index] = not self.states[index]
-		self.devices.lcd.write(self.get_checkbox_char(index), (1, self.index_to_row(index)))
+		self.states ^= 1 << index
+		self.devices.lcd.write(self.get_checkbox_char(index), (1, self.rows[index]))
 
 	def on_select_pressed(self) -> None:
 		"""
@@ -993,7 +1170,7 @@ class VerticalCheckboxes(VerticalMenu):
 		:return: All items' checked state ordered by the original order of all items
 		"""
 
-		return self.states
+		return [bool(self.states & (1 << i)) for i in range(self.option_count)]
 
 	def format_menu_item(self, index: int, name: str) -> str:
 		"""
@@ -1006,6 +1183,17 @@ class VerticalCheckboxes(VerticalMenu):
 
 		return self.get_checkbox_char(index) + name
 
+	def build_menu_items(self) -> list[str]:
+		"""
+		Overridden to prefix each item with its checkbox in one pass instead of calling format_menu_item() per item.
+
+		:return: Item names preceded with their checkboxes
+		"""
+
+		checkbox_chars = self.checkbox_chars
+		states = self.states
+		return [checkbox_chars[(states >> i) & 1] + name for i, name in enumerate(self.options)]
+
 	def wait(self) -> list[bool]:
 		"""
 		Returns a list of the state of each checkbox.
@@ -1013,5 +1201,4 @@ class VerticalCheckboxes(VerticalMenu):
 		:return: The checked state for each checkbox in the same order as the items provided during construction
 		"""
 
-		response = super().wait()
-		return None if response is None else self.states
\ No newline at end of file
+		return super().wait()
\ No newline at end of file
@@ -9,10 +9,9 @@ from busio import I2C
 
 from util import Util
 
-# noinspection PyBroadException
 try:
 	from typing import List, Optional, Callable, Any
-except:
+except ImportError:
 	# don't care
 	pass
 
@@ -43,6 +42,7 @@ class WaitTickListener:
 		self.on_tick = on_tick
 		self.only_invoke_if = only_invoke_if
 		self.last_triggered = None
+		self.next_deadline: Optional[float] = None
 		self.recurring = recurring
 		self.name = name
 
@@ -104,16 +104,31 @@ class Button(DigitalIO):
 		second item is for how long the button was held in seconds or 0 if it wasn't.
 		"""
 
-		if not self.value:
+		return self.was_pressed_from_value(self.value)
+
+	def was_pressed_from_value(self, value: bool, now: Optional[float] = None) -> tuple[bool, float]:
+		"""
+		Same as was_pressed() but for a pin value that was already read, like from a bulk read of several pins at
+		once, so the seesaw isn't queried again.
+
+		:param value: Pin value; False if the button is down because it's pulled up
+		:param now: Current monotonic time if the caller already has it, or None to read it
+		:return: Same as was_pressed()
+		"""
+
+		if now is None:
+			now = time.monotonic()
+
+		if not value:
 			if not self.is_pressed:
-				self.press_start = time.monotonic()
+				self.press_start = now
 			self.is_pressed = True
 
-			return False, time.monotonic() - self.press_start
+			return False, now - self.press_start
 
-		if self.value and self.is_pressed:
+		if self.is_pressed:
 			self.is_pressed = False
-			return True, time.monotonic() - self.press_start
+			return True, now - self.press_start
 
 		return False, 0
 
@@ -137,7 +152,25 @@ class RotaryEncoder:
 	CLOCKWISE = 10
 	COUNTERCLOCKWISE = 11
 
+	# inputs that mean the same thing in most UIs, for membership tests instead of chained comparisons
+	INCREMENT_INPUTS = (UP, CLOCKWISE)
+	DECREMENT_INPUTS = (DOWN, COUNTERCLOCKWISE)
+	ACCEPT_INPUTS = (SELECT, RIGHT)
+
 	HOLD_FOR_SHUTDOWN_SECONDS = 2
+	# only these buttons do anything when held: SELECT shuts down and DOWN resets
+	HOLD_INPUTS = (SELECT, DOWN)
+
+	# while nothing's happening, sleep between polls starting at the minimum and doubling up to the maximum; the
+	# maximum is kept well under the length of a quick button tap so one can't fall between two polls
+	IDLE_SLEEP_MIN_SECONDS = 0.001
+	IDLE_SLEEP_MAX_SECONDS = 0.02
+
+	# how often polling feeds the watchdog; a quarter of the timeout code.py sets so a feed is never close to late
+	WATCHDOG_FEED_INTERVAL_SECONDS = 5
+
+	# set once the seesaw's product ID has been checked so constructing another instance doesn't read it again
+	seesaw_verified = False
 
 	def __init__(self, i2c: I2C):
 		"""
@@ -152,8 +185,11 @@ class RotaryEncoder:
 
 		self.last_position = None
 		self.buttons = {}
+		self.button_pins: tuple[tuple[int, Button, int], ...] = ()
+		self.button_mask = 0
 		self.last_button_down = None
 		self.last_button_down_times = {}
+		self.last_watchdog_feed: float = 0
 
 		self.seesaw = self.init_seesaw()
 		self.encoder = self.init_rotary_encoder()
@@ -161,13 +197,15 @@ class RotaryEncoder:
 	def init_seesaw(self) -> seesaw.Seesaw:
 		"""
 		Connects to the Seesaw controller on the I2C bus at address 0x49 and verifies that it's using the product ID
-		5740.
+		5740, unless that was already verified since the microcontroller started.
 
 		:return: Seesaw controller
 		"""
 		seesaw_controller = seesaw.Seesaw(self.i2c, addr = 0x49)
-		product_id = (seesaw_controller.get_version() >> 16) & 0xFFFF
-		assert product_id == 5740
+		if not RotaryEncoder.seesaw_verified:
+			product_id = (seesaw_controller.get_version() >> 16) & 0xFFFF
+			assert product_id == 5740
+			RotaryEncoder.seesaw_verified = True
 		return seesaw_controller
 
 	def init_rotary_encoder(self) -> rotaryio.IncrementalEncoder:
@@ -189,6 +227,10 @@ class RotaryEncoder:
 
 		for pin in buttons:
 			self.buttons[pin] = Button(self.seesaw, pin)
+			self.button_mask |= 1 << pin
+
+		# (pin, button, pin's bit) for polling without going through the dict or shifting each time
+		self.button_pins = tuple((pin, self.buttons[pin], 1 << pin) for pin in buttons)
 
 		encoder = rotaryio.IncrementalEncoder(self.seesaw)
 		self.last_position = encoder.position
@@ -213,62 +255,110 @@ class RotaryEncoder:
 
 		response = None
 
-		if extra_wait_tick_listeners is None:
-			extra_wait_tick_listeners = []
+		# combined once here instead of on every poll
+		wait_tick_listeners = self.on_wait_tick_listeners
+		if extra_wait_tick_listeners:
+			wait_tick_listeners = wait_tick_listeners + extra_wait_tick_listeners
 
 		start = time.monotonic()
+
+		# listeners that can still fire during this wait, each armed with the monotonic time it's next due; one-time
+		# ones drop out of this once they have
+		pending_listeners = []
+		for listener in wait_tick_listeners:
+			last_triggered = listener.last_triggered
+			if last_triggered is None:
+				listener.next_deadline = start + listener.seconds
+			elif listener.recurring:
+				listener.next_deadline = last_triggered + listener.seconds
+			else:
+				continue
+			pending_listeners.append(listener)
+
+		idle_sleep = RotaryEncoder.IDLE_SLEEP_MIN_SECONDS
 		while response is None:
-			response = self.poll_for_input()
-			self.trigger_applicable_listeners(extra_wait_tick_listeners, start)
+			now = time.monotonic()
+			response = self.poll_for_input(now = now)
+			self.trigger_applicable_listeners(pending_listeners, start, now)
+
+			if response is None:
+				time.sleep(idle_sleep)
+				idle_sleep = min(idle_sleep * 2, RotaryEncoder.IDLE_SLEEP_MAX_SECONDS)
 
 		for activity_listener in self.on_activity_listeners:
 			activity_listener()
 
-			for wait_tick_listener in self.on_wait_tick_listeners + extra_wait_tick_listeners:
-				wait_tick_listener.last_triggered = None # reset for next call of wait()
+		for wait_tick_listener in wait_tick_listeners:
+			wait_tick_listener.last_triggered = None # reset for next call of wait()
 
 		return response
 
-	def trigger_applicable_listeners(self, extra_wait_tick_listeners: List[WaitTickListener], start: float) -> None:
+	@staticmethod
+	def trigger_applicable_listeners(
+		wait_tick_listeners: List[WaitTickListener],
+		start: float,
+		now: Optional[float] = None
+	) -> None:
 		"""
-		Triggers any wait tick listeners that are due to be invoked by now.
+		Triggers any wait tick listeners whose next_deadline has been reached and re-arms the recurring ones. Listeners
+		that aren't recurring are removed from the given list once they're triggered so later calls don't keep checking
+		them.
 
-		:param extra_wait_tick_listeners: Also trigger these additional listeners if necessary
+		:param wait_tick_listeners: Listeners to check, including on_wait_tick_listeners, already armed by wait()
 		:param start: Monotonic time for when input listening started
+		:param now: Current monotonic time if the caller already has it, or None to read it
 		"""
 
-		now = time.monotonic()
+		if now is None:
+			now = time.monotonic()
 		elapsed = now - start
 
-		for listener in self.on_wait_tick_listeners + extra_wait_tick_listeners:
-			if elapsed > listener.seconds and listener.last_triggered is None:
+		triggered_once = None
+		for listener in wait_tick_listeners:
+			if now >= listener.next_deadline:
 				listener.trigger(elapsed)
 				listener.last_triggered = now
-			elif listener.recurring and listener.last_triggered is not None:
-				last_relative_triggered = now - listener.last_triggered
-				if last_relative_triggered >= listener.seconds:
-					listener.trigger(elapsed)
-					listener.last_triggered = now
-
-	def poll_for_input(self, listen_for_buttons: bool = True, listen_for_rotation: bool = True) -> int:
+				if listener.recurring:
+					listener.next_deadline = now + listener.seconds
+				else:
+					if triggered_once is None:
+						triggered_once = []
+					triggered_once.append(listener)
+
+		if triggered_once is not None:
+			for listener in triggered_once:
+				wait_tick_listeners.remove(listener)
+
+	def poll_for_input(self,
+		listen_for_buttons: bool = True,
+		listen_for_rotation: bool = True,
+		now: Optional[float] = None
+	) -> int:
 		"""
 		Blocks waiting for the user to make any kind of input.
 
 		:param listen_for_buttons: Return once a button is pressed
 		:param listen_for_rotation: Return once rotation is made
+		:param now: Current monotonic time if the caller already has it, or None to read it
 		:return: The button that was pressed or direction of rotation; refer to the class-level fields for constants
 		"""
 
 		response = None
 
-		for key, button in self.buttons.items():
-			was_pressed, hold_time = button.was_pressed()
-			if hold_time >= RotaryEncoder.HOLD_FOR_SHUTDOWN_SECONDS:
-				if button.pin == RotaryEncoder.SELECT and len(self.on_shutdown_requested_listeners) > 0:
+		if now is None:
+			now = time.monotonic()
+
+		# one read for every button instead of one per button
+		button_states = self.seesaw.digital_read_bulk(self.button_mask)
+
+		for key, button, bit in self.button_pins:
+			was_pressed, hold_time = button.was_pressed_from_value(bool(button_states & bit), now)
+			if key in RotaryEncoder.HOLD_INPUTS and hold_time >= RotaryEncoder.HOLD_FOR_SHUTDOWN_SECONDS:
+				if key == RotaryEncoder.SELECT and len(self.on_shutdown_requested_listeners) > 0:
 					for listener in self.on_shutdown_requested_listeners:
 						listener()
 					raise RuntimeError("No listeners initiated shutdown!")
-				elif button.pin == RotaryEncoder.DOWN and len(self.on_reset_requested_listeners) > 0:
+				elif key == RotaryEncoder.DOWN and len(self.on_reset_requested_listeners) > 0:
 					try:
 						for listener in self.on_reset_requested_listeners:
 							listener()
@@ -282,13 +372,12 @@ class RotaryEncoder:
 			current_position = self.encoder.position
 			last_position = self.last_position
 
-			self.last_position = current_position
-
-			if current_position > last_position:
-				response = RotaryEncoder.CLOCKWISE
-			elif current_position < last_position:
-				response = RotaryEncoder.COUNTERCLOCKWISE
+			if current_position != last_position:
+				self.last_position = current_position
+				response = RotaryEncoder.CLOCKWISE if current_position > last_position else RotaryEncoder.COUNTERCLOCKWISE
 
-		microcontroller.watchdog.feed()
+		if now - self.last_watchdog_feed >= RotaryEncoder.WATCHDOG_FEED_INTERVAL_SECONDS:
+			microcontroller.watchdog.feed()
+			self.last_watchdog_feed = now
 
 		return response
\ No newline at end of file
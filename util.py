@@ -5,15 +5,13 @@ Static utility methods.
 import time
 
 import adafruit_datetime
-import traceback
 from busio import I2C
 
-# noinspection PyBroadException
 try:
 	from typing import Callable, Optional, Any, List, Dict, TypeVar
 	I2CDevice = TypeVar("I2CDevice")
 	AttemptResponse = TypeVar("AttemptResponse")
-except:
+except ImportError:
 	TypeVar = lambda: None
 	I2CDevice = lambda: None
 
@@ -22,38 +20,124 @@ class Util:
 	Utility methods.
 	"""
 
+	# elapsed times under a minute are the most common while timing, so don't build them from scratch every second
+	SECONDS_STRS = tuple(f"{i} sec" for i in range(60))
+
+	# the battery percent gets redrawn constantly but can only ever be one of these
+	BATTERY_PERCENT_STRS = tuple(f"{i}%" for i in range(101))
+
+	# 12-hour hour and meridian for each hour of the day: 0 is "12" and "a", 13 is "1" and "p", etc.
+	HOUR_STRS = tuple(str((hour + 11) % 12 + 1) for hour in range(24))
+	MERIDIANS = "a" * 12 + "p" * 12
+
+	# the same timestamps, like the last feeding or an active timer's start, come back from the API over and over, so
+	# keep what they parsed to; emptied once it's full instead of tracking which entry is oldest
+	DATETIME_CACHE_MAX_SIZE = 16
+	datetime_cache: Dict[str, adafruit_datetime.datetime] = {}
+
+	# timezones by UTC offset in minutes; only a couple ever show up, so build each one once
+	timezones: Dict[int, adafruit_datetime.timezone] = {0: adafruit_datetime.timezone.utc}
+
 	@staticmethod
 	def format_elapsed_time(elapsed: float) -> str:
 		"""
 		Takes a duration and makes a human-readable version of it.
 
 		:param elapsed: Seconds elapsed
-		:return: Like "1h 23m 56s" for 5,036 seconds
+		:return: Like "1 hr 23 min 56 sec" for 5,036 seconds. Everything after the leading unit is zero-padded, like
+		"2 min 05 sec", so the string never gets shorter as time passes.
 		"""
 		elapsed = int(elapsed)
 
 		if elapsed < 60:
-			return f"{elapsed:.0f} sec"
-		elif elapsed < 60 * 60:
-			return f"{(elapsed // 60):.0f} min {(int(elapsed) % 60):.0f} sec"
-		else:
-			return f"{(elapsed // 60 // 60):.0f} hr {(elapsed // 60 % 60):.0f} min {(int(elapsed) % 60):.0f} sec"
+			return Util.SECONDS_STRS[elapsed] if elapsed >= 0 else f"{elapsed} sec"
+
+		minutes, seconds = divmod(elapsed, 60)
+		if minutes < 60:
+			return f"{minutes} min {seconds:02} sec"
+
+		hours, minutes = divmod(minutes, 60)
+		return f"{hours} hr {minutes:02} min {seconds:02} sec"
 
 	@staticmethod
 	def to_datetime(as_str: str) -> adafruit_datetime.datetime:
 		"""
-		A workaround for a CircuitPython bug that fails to parse ISO times that end with "Z":
-		https://github.com/adafruit/Adafruit_CircuitPython_datetime/issues/22
+		Parses an ISO date/time like Baby Buddy and adafruit.io send, such as "2024-05-01T12:34:56.123456-04:00" or
+		"2024-05-01T12:34:56Z". Those always have the same layout, so the fields are sliced out directly instead of
+		going through adafruit_datetime.datetime.fromisoformat(), which is slow and also fails to parse ISO times that
+		end with "Z": https://github.com/adafruit/Adafruit_CircuitPython_datetime/issues/22
+
+		:param as_str: Date/time as an ISO string
+		:return: The parsed date/time; it's timezone-aware if as_str has "Z" or an offset at the end, otherwise it's
+		naive. Strings without a time are passed to fromisoformat() as-is. The same string parsed again returns the same
+		object, so don't modify it.
+		"""
+
+		parsed = Util.datetime_cache.get(as_str)
+		if parsed is None:
+			parsed = Util.parse_datetime(as_str)
+			if len(Util.datetime_cache) >= Util.DATETIME_CACHE_MAX_SIZE:
+				Util.datetime_cache.clear()
+			Util.datetime_cache[as_str] = parsed
+
+		return parsed
+
+	@staticmethod
+	def parse_datetime(as_str: str) -> adafruit_datetime.datetime:
+		"""
+		Does the actual parsing for to_datetime() without caching the result. Use to_datetime() instead.
 
 		:param as_str: Date/time as an ISO string
-		:return: adafruit_datetime.datetime.fromisoformat(as_str), but if as_str ends with "Z", replace the "Z" with
-		"-00:00" to emulate UTC and a format that it does parse
+		:return: The parsed date/time
 		"""
 
+		length = len(as_str)
+		if length < 19 or as_str[10] != "T":
+			return adafruit_datetime.datetime.fromisoformat(as_str)
+
+		# find where the timezone starts, if there is one: "Z", "+HH:MM", or "-HH:MM"
 		if as_str[-1] == "Z":
-			print(f"Warning: applying workaround for unsupported datetime format {as_str}")
-			as_str = as_str[:-1] + "-00:00"
-		return adafruit_datetime.datetime.fromisoformat(as_str)
+			timezone_start = length - 1
+			timezone = adafruit_datetime.timezone.utc
+		elif length >= 25 and (as_str[-6] == "+" or as_str[-6] == "-"):
+			timezone_start = length - 6
+			offset_minutes = int(as_str[-5:-3]) * 60 + int(as_str[-2:])
+			timezone = Util.get_timezone(-offset_minutes if as_str[-6] == "-" else offset_minutes)
+		else:
+			timezone_start = length
+			timezone = None
+
+		# any fraction of a second sits between the seconds and the timezone and can have any number of digits
+		microsecond = 0
+		if timezone_start > 20 and as_str[19] == ".":
+			microsecond = int((as_str[20:timezone_start] + "00000")[:6])
+
+		return adafruit_datetime.datetime(
+			int(as_str[0:4]),
+			int(as_str[5:7]),
+			int(as_str[8:10]),
+			int(as_str[11:13]),
+			int(as_str[14:16]),
+			int(as_str[17:19]),
+			microsecond,
+			timezone
+		)
+
+	@staticmethod
+	def get_timezone(offset_minutes: int) -> adafruit_datetime.timezone:
+		"""
+		Gets a timezone with a fixed UTC offset, reusing the same object for the same offset.
+
+		:param offset_minutes: Minutes ahead of UTC, or negative for behind
+		:return: Timezone with that offset
+		"""
+
+		timezone = Util.timezones.get(offset_minutes)
+		if timezone is None:
+			timezone = adafruit_datetime.timezone(adafruit_datetime.timedelta(minutes = offset_minutes))
+			Util.timezones[offset_minutes] = timezone
+
+		return timezone
 
 	@staticmethod
 	def datetime_to_time_str(datetime_obj: adafruit_datetime.datetime) -> str:
@@ -64,18 +148,7 @@ class Util:
 		:return: Time string
 		"""
 		hour = datetime_obj.hour
-		minute = datetime_obj.minute
-		meridian = "a"
-
-		if hour == 0:
-			hour = 12
-		elif hour == 12:
-			meridian = "p"
-		elif hour > 12:
-			hour -= 12
-			meridian = "p"
-
-		return f"{hour}:{minute:02}{meridian}"
+		return f"{Util.HOUR_STRS[hour]}:{datetime_obj.minute:02}{Util.MERIDIANS[hour]}"
 
 	@staticmethod
 	def format_battery_percent(percent: int) -> str:
@@ -84,7 +157,7 @@ class Util:
 		:param percent: Battery percent (0..100)
 		:return: Battery percent formatted as a string
 		"""
-		return f"{percent}%"
+		return Util.BATTERY_PERCENT_STRS[percent] if 0 <= percent <= 100 else f"{percent}%"
 
 	@staticmethod
 	def duration_to_seconds(duration: str) -> int:
@@ -96,11 +169,17 @@ class Util:
 		:return: Duration as total number of seconds
 		"""
 
-		duration_parts = duration.split(":")
+		# slice around the separators instead of splitting into a list, and drop any fraction of a second by slicing
+		# instead of parsing it as a float
+		minutes_start = duration.index(":") + 1
+		seconds_start = duration.index(":", minutes_start) + 1
+		seconds_end = duration.find(".", seconds_start)
+		if seconds_end < 0:
+			seconds_end = len(duration)
 
-		hours = int(duration_parts[0])
-		minutes = int(duration_parts[1])
-		seconds = int(float(duration_parts[2]))
+		hours = int(duration[:minutes_start - 1])
+		minutes = int(duration[minutes_start:seconds_start - 1])
+		seconds = int(duration[seconds_start:seconds_end])
 
 		return (hours * 60 * 60) + (minutes * 60) + seconds
 
@@ -109,33 +188,52 @@ class Util:
 			method: Callable[[], AttemptResponse],
 			max_attempts: int = 3,
 			delay_between_attempts: float = 0,
-			quiet: bool = False
+			quiet: bool = False,
+			backoff: float = 1,
+			max_delay_between_attempts: Optional[float] = None,
+			verbose: bool = False
 	) -> AttemptResponse:
 		"""
 		Try doing something a few times in a row and give up if it fails repeatedly.
 
 		:param method: Try doing this thing. If doing the thing fails, this method must throw an exception.
 		:param max_attempts: How many times to try doing the thing until it doesn't throw an exception.
-		:param delay_between_attempts: Wait this many seconds between retry attempts
+		:param delay_between_attempts: Wait this many seconds before the first retry attempt
 		:param quiet: Don't print anything if an attempt fails
+		:param backoff: Multiply the delay by this after each retry attempt; 1 waits the same amount every time
+		:param max_delay_between_attempts: Never wait longer than this many seconds between attempts, or None for no
+		limit
+		:param verbose: Also print the full traceback when an attempt fails, unless quiet; printing it is slow enough
+		to noticeably delay the next attempt
 		:return: Whatever method returned
 		"""
 
 		assert delay_between_attempts >= 0
-		attempts = 0
-		while True:
+		assert backoff >= 1
+		# the first try plus max_attempts retries; the last failure is raised once the loop runs out instead of from
+		# inside the handler
+		last_exception = None
+		for attempts in range(max_attempts + 1):
 			try:
 				return method()
 			except Exception as e:
-				attempts += 1
-				if attempts > max_attempts:
-					raise e
+				last_exception = e
 
-				if not quiet:
-					print(f"Attempt #{attempts} of {max_attempts} failed with {type(e).__name__}, trying again to invoke: {method}")
-					traceback.print_exception(e)
-				if delay_between_attempts > 0:
-					time.sleep(delay_between_attempts)
+			if attempts == max_attempts:
+				break
+
+			if not quiet:
+				print(f"Attempt #{attempts + 1} of {max_attempts} failed with {type(last_exception).__name__}: {last_exception}, trying again to invoke: {method}")
+				if verbose:
+					import traceback
+					traceback.print_exception(last_exception)
+			if delay_between_attempts > 0:
+				time.sleep(delay_between_attempts)
+				delay_between_attempts *= backoff
+				if max_delay_between_attempts is not None and delay_between_attempts > max_delay_between_attempts:
+					delay_between_attempts = max_delay_between_attempts
+
+		raise last_exception
 
 
 class I2CDeviceAutoSelector:
@@ -143,41 +241,70 @@ class I2CDeviceAutoSelector:
 	Finds and returns devices on the I2C bus.
 	"""
 
+	# while something else holds the bus, wait this long between attempts to lock it, doubling up to the maximum
+	LOCK_RETRY_MIN_SECONDS = 0.001
+	LOCK_RETRY_MAX_SECONDS = 0.01
+
 	def __init__(self, i2c: I2C):
 		"""
 		:param i2c: I2C bus
 		"""
 		self.i2c = i2c
 
-	def known_addresses(self) -> List[int]:
+	def lock(self) -> None:
 		"""
-		Lists all known addresses on the I2C bus by locking, scanning, and unlocking it.
-		:return: All discovered addresses on I2C bus
+		Blocks until this bus is locked, sleeping between attempts while something else holds it. Unlock it when done.
 		"""
 
+		lock_retry_delay = I2CDeviceAutoSelector.LOCK_RETRY_MIN_SECONDS
 		while not self.i2c.try_lock():
-			pass
-		i2c_address_list = self.i2c.scan()
-		self.i2c.unlock()
+			time.sleep(lock_retry_delay)
+			lock_retry_delay = min(lock_retry_delay * 2, I2CDeviceAutoSelector.LOCK_RETRY_MAX_SECONDS)
 
-		return i2c_address_list
-
-	def address_exists(self, address: int) -> bool:
+	def probe(self, address: int) -> bool:
 		"""
-		Checks if the I2C bus has a device with the given address.
+		Checks if a device responds on the given address without scanning the whole bus. Like
+		adafruit_bus_device.I2CDevice, this tries an empty write and then, because some devices don't acknowledge
+		those, a one byte read.
 
 		TODO this should use busio.I2C.probe() in CircuitPython 9.2
 
+		:param address: Device's address
+		:return: True if a device acknowledged the address
+		"""
+
+		self.lock()
+		try:
+			try:
+				self.i2c.writeto(address, b"")
+				return True
+			except OSError:
+				pass
+
+			try:
+				self.i2c.readfrom_into(address, bytearray(1))
+				return True
+			except OSError:
+				return False
+		finally:
+			self.i2c.unlock()
+
+	def address_exists(self, address: int) -> bool:
+		"""
+		Checks if the I2C bus has a device with the given address by probing just that address instead of scanning the
+		whole bus.
+
 		:param address: Device's address
 		:return: True if such a device exists and responds
 		"""
 
-		return address in self.known_addresses()
+		return self.probe(address)
 
 	def get_device(self,
 		address_map: Dict[int, Callable[[int], I2CDevice]],
 		max_attempts: int = 20,
-		delay_between_attempts: float = 0.2
+		delay_between_attempts: float = 0.05,
+		max_delay_between_attempts: float = 0.2
 	) -> I2CDevice:
 		"""
 		Searches the I2C bus for a set of known addresses and, once one is found on the bus that is in the list provided,
@@ -185,7 +312,9 @@ class I2CDeviceAutoSelector:
 		:param address_map: Map of I2C addresses to methods that, given that address, can construct an I2CDevice
 		:param max_attempts: If the address isn't found or fails to initialize, try again this many times before giving
 		up and raising an exception.
-		:param delay_between_attempts: Wait this many seconds between attempts to create the I2CDevice
+		:param delay_between_attempts: Wait this many seconds before the first retry attempt to create the I2CDevice,
+		doubling after each one
+		:param max_delay_between_attempts: Don't wait longer than this many seconds between attempts
 		:return: An initialized I2CDevice for the first address found
 		"""
 
@@ -193,7 +322,9 @@ class I2CDeviceAutoSelector:
 			max_attempts = max_attempts,
 			delay_between_attempts = delay_between_attempts,
 			method = lambda: self.try_get_device(address_map = address_map),
-			quiet = True
+			quiet = True,
+			backoff = 2,
+			max_delay_between_attempts = max_delay_between_attempts
 		)
 
 	def try_get_device(self, address_map: Dict[int, Callable[[int], I2CDevice]]) -> I2CDevice:
@@ -205,10 +336,9 @@ class I2CDeviceAutoSelector:
 		:return: Initialized I2CDevice for the first address found
 		"""
 
-		address_list = self.known_addresses()
-
+		# only the few mapped addresses are probed, in order, instead of scanning every address on the bus
 		for address, method in address_map.items():
-			if address in address_list:
+			if self.probe(address):
 				device = method(address)
 				print(f"Using {type(device).__name__} on address {hex(address)}")
 				return device